@@ -1,7 +1,7 @@
 import json
 import logging
 from pathlib import Path
-from src.evaluate_quiz import evaluate_answer
+from src.evaluate_quiz import evaluate_answer, is_score
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -60,16 +60,21 @@ def evaluate_all_candidates_from_json(
                     role=job_field  # Use job_field as role
                 )
                 
+                # A reply without a numeric score (e.g. parsed from prose) counts as 0
+                score = evaluation.get("overall_score")
+                if not is_score(score):
+                    score = 0
+
                 # Store evaluation result
                 evaluation_results[job_field]["candidate_evaluations"][candidate_id] = {
                     "name": candidate_name,
                     "file": candidate_info["file"],
                     "evaluation": evaluation,
-                    "overall_score": evaluation.get("overall_score", 0),
+                    "overall_score": score,
                     "recommendation": evaluation.get("recommendation", "FAIL")
                 }
                 
-                logger.info(f"✓ Score: {evaluation.get('overall_score', 0)}/10 - {evaluation.get('recommendation', 'N/A')}")
+                logger.info(f"✓ Score: {score}/10 - {evaluation.get('recommendation', 'N/A')}")
                 
                 # Mark as evaluated in master file
                 master_data[job_field]["candidates"][candidate_id]["evaluated"] = True
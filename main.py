@@ -1,8 +1,7 @@
 from pathlib import Path
-import json
 import logging
 from config import Config
-from src.cv_extractor import CVExtractor
+from src.cv_extractor import CVExtractor, extract_cvs, load_extracted_cvs
 from src.generate_gpt_quiz import gpt_quiz
 from src.job_desc_samples import (
     ai_description,
@@ -52,8 +51,11 @@ def main(job_description: str, sector: str, job_field: str, cv_files: list = Non
     if cv_files:
         logger.info("Extracting CVs from files: %s", cv_files)
         cv_file_path = extract_cvs(cv_files)
-        with open(cv_file_path, "r", encoding="utf-8") as f:
-            cvs_data = list(json.load(f).values())
+        if cv_file_path:
+            # the file accumulates every CV ever extracted; keep this job's files
+            requested = {Path(f).name for f in cv_files}
+            cvs_data = [cv for filename, cv in load_extracted_cvs(cv_file_path).items()
+                        if filename in requested]
         logger.info("CVs extracted successfully: %d candidates", len(cvs_data))
     else:
         logger.warning("No CV files provided, proceeding without CV extraction.")
@@ -18,8 +18,37 @@ from datetime import datetime
 import re
 
 
+# Single pass over the model output: drops trailing commas before both } and ]
+TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
+# Fields that identify the same entry when it shows up on more than one page
+MERGE_DEDUP_KEYS = {
+    'education': ('degree', 'institution'),
+    'experience': ('job_title', 'company'),
+    'projects': ('name',),
+}
+
+
+def _merge_key(item: Dict, keys) -> tuple:
+    key = tuple(item.get(k) for k in keys)
+    try:
+        hash(key)
+    except TypeError:
+        key = tuple(repr(v) for v in key)
+    return key
+
+
+def _item_key(item):
+    """Hashable stand-in for a non-dict list item; nested lists/dicts are serialised."""
+    try:
+        hash(item)
+    except TypeError:
+        return ('json', json.dumps(item, sort_keys=True, default=repr))
+    return ('item', item)
+
+
 class PreciseCVExtractor:
-    def _init_(self, model_name: str = "Qwen/Qwen2-VL-7B-Instruct"):
+    def __init__(self, model_name: str = "Qwen/Qwen2-VL-7B-Instruct"):
         print("=" * 60)
         print(" Loading Precise CV Extractor")
         print("=" * 60)
@@ -48,6 +77,11 @@ class PreciseCVExtractor:
 
             self.model.eval()
 
+            # Per-token decode is launch-bound; with a static KV cache generate()
+            # compiles only the decode step (reduce-overhead, i.e. CUDA graphs)
+            # and runs the variable-shape prefill eagerly
+            self.use_cuda_graphs = torch.cuda.is_available()
+
         except Exception as e:
             print(f"Error: {e}")
             raise
@@ -205,7 +239,8 @@ REMEMBER: Extract ONLY what you can SEE. Nothing more."""
                     temperature=0.2,
                     do_sample=True,
                     top_p=0.95,
-                    repetition_penalty=1.1
+                    repetition_penalty=1.1,
+                    cache_implementation="static" if self.use_cuda_graphs else None,
                 )
 
             generated_ids_trimmed = [
@@ -250,8 +285,7 @@ REMEMBER: Extract ONLY what you can SEE. Nothing more."""
             if start_idx != -1 and end_idx > start_idx:
                 json_text = json_text[start_idx:end_idx]
 
-            json_text = re.sub(r',\s*}', '}', json_text)
-            json_text = re.sub(r',\s*]', ']', json_text)
+            json_text = TRAILING_COMMA_RE.sub(r'\1', json_text)
 
             data = json.loads(json_text)
             data = self.clean_extracted_data(data)
@@ -335,6 +369,9 @@ REMEMBER: Extract ONLY what you can SEE. Nothing more."""
             return pages[0]
 
         merged = pages[0].copy() if pages[0] else {}
+        # Per-field hashed keys of what is already merged, so each incoming
+        # item is checked with one set lookup instead of a scan of the list
+        seen = {}
 
         for page in pages[1:]:
             if not page:
@@ -348,50 +385,45 @@ REMEMBER: Extract ONLY what you can SEE. Nothing more."""
                         if value and (key not in merged[field] or not merged[field][key]):
                             merged[field][key] = value
 
-            list_fields = ['education', 'experience', 'projects', 'certifications', 'languages']
-            for field in list_fields:
+            for field in ['education', 'experience', 'projects', 'certifications', 'languages']:
                 if field in page and isinstance(page[field], list):
                     if field not in merged:
                         merged[field] = []
 
-                    for item in page[field]:
-                        is_duplicate = False
+                    keys = MERGE_DEDUP_KEYS.get(field)
+                    if field not in seen:
+                        seen[field] = {
+                            ('dict', _merge_key(existing, keys)) if isinstance(existing, dict) else _item_key(existing)
+                            for existing in merged[field]
+                            if not isinstance(existing, dict) or keys
+                        }
 
+                    for item in page[field]:
                         if isinstance(item, dict):
-                            for existing in merged[field]:
-                                if isinstance(existing, dict):
-                                    if field == 'education':
-                                        if (
-                                            item.get('degree') == existing.get('degree') and
-                                            item.get('institution') == existing.get('institution')
-                                        ):
-                                            is_duplicate = True
-                                            break
-                                    elif field == 'experience':
-                                        if (
-                                            item.get('job_title') == existing.get('job_title') and
-                                            item.get('company') == existing.get('company')
-                                        ):
-                                            is_duplicate = True
-                                            break
-                                    elif field == 'projects':
-                                        if item.get('name') == existing.get('name'):
-                                            is_duplicate = True
-                                            break
+                            if not keys:
+                                merged[field].append(item)
+                                continue
+                            key = ('dict', _merge_key(item, keys))
                         else:
-                            if item in merged[field]:
-                                is_duplicate = True
+                            key = _item_key(item)
 
-                        if not is_duplicate:
+                        if key not in seen[field]:
+                            seen[field].add(key)
                             merged[field].append(item)
 
             if 'technical_skills' in page:
                 if 'technical_skills' not in merged:
                     merged['technical_skills'] = []
+                if 'technical_skills' not in seen:
+                    seen['technical_skills'] = {_item_key(skill) for skill in merged['technical_skills']}
 
                 if isinstance(page['technical_skills'], list):
                     for skill in page['technical_skills']:
-                        if skill and skill not in merged['technical_skills']:
+                        if not skill:
+                            continue
+                        key = _item_key(skill)
+                        if key not in seen['technical_skills']:
+                            seen['technical_skills'].add(key)
                             merged['technical_skills'].append(skill)
 
         merged = self.clean_extracted_data(merged)
@@ -465,7 +497,7 @@ REMEMBER: Extract ONLY what you can SEE. Nothing more."""
             raise ValueError(f"Invalid path: must be a PDF file or directory")
 
         if not pdf_files:
-            return {"total": 0, "successful": 0, "failed": 0, "data": []}
+            return {"total": 0, "successful": 0, "failed": 0, "output_file": None}
 
         print("\n" + "=" * 60)
         print(" CV EXTRACTION")
@@ -474,29 +506,29 @@ REMEMBER: Extract ONLY what you can SEE. Nothing more."""
         print(f"Output: {self.output_dir.absolute()}")
         print("=" * 60)
 
-        all_results = []
+        combined_jsonl_path = self.output_dir / "all_cvs_combined.jsonl"
         successful = 0
         failed_files = []
 
-        for i, pdf_file in enumerate(pdf_files, 1):
-            print(f"\n[{i}/{len(pdf_files)}]", end=" ")
+        # One JSON object per line, written as each CV finishes, so memory
+        # does not grow with the number of CVs and a crash keeps prior results
+        with open(combined_jsonl_path, 'w', encoding='utf-8') as combined:
+            for i, pdf_file in enumerate(pdf_files, 1):
+                print(f"\n[{i}/{len(pdf_files)}]", end=" ")
 
-            result = self.extract_single_cv(pdf_file)
-
-            if result and result.get('personal_info'):
-                all_results.append(result)
-                successful += 1
-            else:
-                failed_files.append(pdf_file.name)
+                result = self.extract_single_cv(pdf_file)
 
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+                if result and result.get('personal_info'):
+                    combined.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    combined.flush()
+                    successful += 1
+                else:
+                    failed_files.append(pdf_file.name)
 
-        if all_results:
-            combined_json_path = self.output_dir / "all_cvs_combined.json"
-            with open(combined_json_path, 'w', encoding='utf-8') as f:
-                json.dump(all_results, f, indent=2, ensure_ascii=False)
+                del result
+                gc.collect()
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
 
         print("\n" + "=" * 60)
         print(f" SUCCESS: {successful}/{len(pdf_files)}")
@@ -506,33 +538,35 @@ REMEMBER: Extract ONLY what you can SEE. Nothing more."""
 
         if failed_files:
             print(f"\n✗ Failed files:")
-            for file in failed_files[CV_FOLDER = r"C:\\Users\\alsha\\OneDrive\\Documents\\resume"
-                                      
-
-            MAX_FILES = 5
-
-            print("\n" + "=" * 60)
-            print(" Starting Precise CV Extraction")
-            print("=" * 60)
-
-            extractor = PreciseCVExtractor()
-
-            results = extractor.extract_batch(CV_FOLDER, max_files=MAX_FILES)
-
-            print("\nProcess completed!")
-            print(f"Check results at: extracted_cvs_precise/")
-
-            if results['successful'] > 0:
-                print(f"\nSuccessfully processed {results['successful']} CVs")
-                print("Files created:")
-                print("  - Individual JSON for each CV")
-                print("  - all_cvs_combined.json (all CVs in one file)"):5]:
+            for file in failed_files[:5]:
                 print(f"  - {file}")
 
         return {
             "total": len(pdf_files),
             "successful": successful,
             "failed": len(pdf_files) - successful,
-            "data": all_results,
+            "output_file": str(combined_jsonl_path),
             "failed_files": failed_files
         }
+
+
+if __name__ == "__main__":
+    CV_FOLDER = r"C:\\Users\\alsha\\OneDrive\\Documents\\resume"
+    MAX_FILES = 5
+
+    print("\n" + "=" * 60)
+    print(" Starting Precise CV Extraction")
+    print("=" * 60)
+
+    extractor = PreciseCVExtractor()
+
+    results = extractor.extract_batch(CV_FOLDER, max_files=MAX_FILES)
+
+    print("\nProcess completed!")
+    print(f"Check results at: extracted_cvs_precise/")
+
+    if results['successful'] > 0:
+        print(f"\nSuccessfully processed {results['successful']} CVs")
+        print("Files created:")
+        print("  - Individual JSON for each CV")
+        print("  - all_cvs_combined.jsonl (one CV per line)")
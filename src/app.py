@@ -1,16 +1,30 @@
 # FastAPI placeholder app for CV + Company input
 # UI unchanged; wired to main.py pipeline functions.
-from fastapi import FastAPI, UploadFile, Form, Request, File
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, PlainTextResponse
-from src.candidate_matching import match_candidates
-from cv_extractor import extract_cvs as pipeline_extract_cvs
-from main import main as pipeline_mainextract_cvs
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse, Response
+from starlette.concurrency import run_in_threadpool
 
 from pathlib import Path
-from typing import Optional, List
-import shutil
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import quote
+from uuid import UUID, uuid4
+import atexit
+import gzip
+import hashlib
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import escape
+from streaming_form_data import ParseFailedException, StreamingFormDataParser
+from streaming_form_data.targets import BaseTarget, ListTarget, ValueTarget
+from streaming_form_data.validators import MaxSizeValidator, ValidationError
 
 # ---- import your pipeline functions from main.py ----
 # rename to avoid accidental name collisions
@@ -20,285 +34,350 @@ from main import main as pipeline_main
 app = FastAPI(title="Recruitment MVP")
 
 STATIC_DIR = Path(__file__).parent / "static"
+TEMPLATES_DIR = Path(__file__).parent / "templates"
 UPLOADS_DIR = Path(__file__).parent / "uploads"
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+SESSIONS_DIR = UPLOADS_DIR / "sessions"
+SESSIONS_DIR.mkdir(exist_ok=True)
+SESSION_COOKIE = "nukhbah_session"
+
+# Roles offered by the company form checkboxes
+_VALID_ROLES = frozenset({"AI Engineer", "Software Engineer", "Cloud Engineer", "Cyber Security", "Fullstack Developer"})
+_AI_ROLE = "AI Engineer"
+
+# Hard cap per uploaded file; the body is streamed, so this bounds disk, not RAM
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
 
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+# dynamic pages; the cached ones below already carry Content-Encoding and pass through
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
-logging.basicConfig(level=logging.INFO)
+# Request handlers only enqueue log records; a listener thread does the
+# blocking stderr writes with whatever handlers the pipeline modules set up.
+_log_queue = queue.Queue(-1)
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_log_listener = QueueListener(
+    _log_queue, *(_root_logger.handlers or [logging.StreamHandler()]), respect_handler_level=True
+)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger("app")
 
-# ---------- Shared tiny CSS & JS ----------
-BASE_STYLE = """
-<style>
-  :root { --bg:#0f172a; --card:#111827; --text:#e5e7eb; --muted:#94a3b8; --accent:#22d3ee; }
-  * { box-sizing: border-box; font-family: ui-sans-serif, system-ui, -apple-system, "Segoe UI", Roboto, "Helvetica Neue", Arial; }
-  body { margin:0; background:linear-gradient(180deg,#0b1220,#0f172a); color:var(--text); }
-  .wrap { max-width: 760px; margin: 48px auto; padding: 0 16px; }
-  .card {
-    background: rgba(255, 255, 255, 0.1);
-    border-radius: 12px; 
-    padding: 20px;
-    backdrop-filter: blur(10px);
-    -webkit-backdrop-filter: blur(10px);
-    border: 1px solid rgba(255,255,255,0.12);
-  }
-  h1 { margin: 0 0 8px; font-size: 28px; }
-  p.lead { color: var(--muted); margin-top: 0; }
-  .grid { display:grid; gap:16px; }
-  .row { display:flex; gap:12px; flex-wrap:wrap; align-items:center; }
-  label { font-size:14px; color: var(--muted); display:block; margin-bottom:6px; }
-  input[type="text"], textarea, input[type="file"], select {
-    width:100%; padding:12px 14px; color:var(--text); background:#0b1220; border:1px solid #263043; border-radius:12px; outline:none;
-  }
-  .logo {
-    position: absolute; top: 10px; right: 10px; width: 120px;
-  }
-  textarea { min-height: 140px; resize: vertical; }
-  .btn {
-    background: var(--accent); color:#001015; border:none; padding:12px 18px; border-radius:12px;
-    font-weight: 700; cursor: pointer; transition: transform .05s ease-in-out;
-  }
-  .btn:hover { transform: translateY(-5px); }
-  .btn.secondary { background:#1f2937; color:var(--text); }
-  .choices { display:grid; gap:10px; margin-top:4px; }
-  .error { color:#fca5a5; font-size:14px; }
-  .success { color:#34d399; font-size:16px; font-weight:700; }
-  .spacer { height:8px; }
-  .center { text-align:center; }
-</style>
-<script>
-  // Enforce exactly one checkbox in the "role" group + toggle CSV upload for AI Engineer
-  function singleCheck(el){
-    const boxes = document.querySelectorAll('input[name="role"]');
-    boxes.forEach(b => { if(b !== el) b.checked = false; });
-
-    const up = document.getElementById('ai-dataset');
-    if (up){
-      if (el.checked && el.value === 'AI Engineer') {
-        up.style.display = 'block';
-      } else {
-        up.style.display = 'none';
-        const file = document.getElementById('dataset_csv');
-        if (file) file.value = '';
-      }
-    }
-  }
-</script>
-"""
-
-# ---------- Small helper: save UploadFile to disk ----------
-def _save_upload(file: UploadFile, dest_dir: Path) -> Path:
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    dest = dest_dir / file.filename
-    with dest.open("wb") as f:
-        shutil.copyfileobj(file.file, f)
-    file.file.close()
-    return dest
+# ---------- Templates ----------
+# Compiled once; auto_reload is off so get_template() never re-stats the files.
+templates = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+)
+
+# ---------- Small helpers: stream multipart uploads to disk ----------
+# parser.data_received() does the file writes, so handlers run it through
+# run_in_threadpool to keep the event loop free while a large upload lands.
+# Files are opened relative to a directory fd held for the app's lifetime, and
+# parsed chunks are buffered so each writev() hands the kernel ~1 MiB at once.
+# Saved files are named by a hash of their content, which keeps client
+# filenames out of the path and turns a re-upload of the same CV into a no-op.
+_UPLOADS_FD = os.open(str(UPLOADS_DIR), os.O_RDONLY | os.O_DIRECTORY)
+atexit.register(os.close, _UPLOADS_FD)
+_WRITEV_BYTES = 1 << 20
+_WRITEV_MAX_CHUNKS = 512   # stay well under IOV_MAX
+
+class _UploadTarget(BaseTarget):
+    """Streams one multipart file to UPLOADS_DIR/<name> with batched writev(), hashing as it goes."""
+
+    def __init__(self, name: str):
+        super().__init__(validator=MaxSizeValidator(MAX_UPLOAD_BYTES))
+        self.name = name
+        self._fd: Optional[int] = None
+        self._buf: List[bytes] = []
+        self._size = 0
+        self.hasher = hashlib.blake2b(digest_size=16)
+
+    def on_start(self):
+        self._fd = os.open(self.name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=_UPLOADS_FD)
+
+    def on_data_received(self, chunk: bytes):
+        self.hasher.update(chunk)
+        self._buf.append(chunk)
+        self._size += len(chunk)
+        if self._size >= _WRITEV_BYTES or len(self._buf) >= _WRITEV_MAX_CHUNKS:
+            self._flush()
+
+    def on_finish(self):
+        self._flush()
+        self.close()
+
+    def _flush(self):
+        if not self._buf:
+            return
+        written = os.writev(self._fd, self._buf)
+        if written < self._size:   # short write: push out the remainder
+            rest = memoryview(b"".join(self._buf))[written:]
+            while rest:
+                rest = rest[os.write(self._fd, rest):]
+        self._buf, self._size = [], 0
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def discard(self):
+        self.close()
+        try:
+            os.unlink(self.name, dir_fd=_UPLOADS_FD)
+        except FileNotFoundError:
+            pass
+
+def _finish_upload(target: _UploadTarget) -> Tuple[Optional[Path], bool]:
+    """Move a streamed upload to its content-hash name.
+
+    Returns (path, is_new); path is None if no file was sent, and is_new is
+    False when an identical file was already stored.
+    """
+    if not target.multipart_filename:
+        target.discard()
+        return None, False
+    dest_name = target.hasher.hexdigest()[:16] + Path(target.multipart_filename).suffix.lower()
+    try:
+        os.stat(dest_name, dir_fd=_UPLOADS_FD)
+    except FileNotFoundError:
+        os.replace(target.name, dest_name, src_dir_fd=_UPLOADS_FD, dst_dir_fd=_UPLOADS_FD)
+        return UPLOADS_DIR / dest_name, True
+    target.discard()
+    return UPLOADS_DIR / dest_name, False
+
+# ---------- Session CV lists ----------
+# CVs uploaded in a browser session are kept in a small file per session on
+# disk instead of app.state, so every uvicorn worker sees the same list.
+def _session_id(request: Request) -> Optional[str]:
+    value = request.cookies.get(SESSION_COOKIE, "")
+    try:
+        return UUID(hex=value).hex if len(value) == 32 else None
+    except ValueError:
+        return None
+
+def _add_session_cv(session: str, cv_path: Path) -> None:
+    with open(SESSIONS_DIR / f"{session}.txt", "a", encoding="utf-8") as f:
+        f.write(f"{cv_path}\n")
+
+def _session_cvs(session: Optional[str]) -> Optional[List[str]]:
+    if session is None:
+        return None
+    try:
+        with open(SESSIONS_DIR / f"{session}.txt", "r", encoding="utf-8") as f:
+            return list(dict.fromkeys(line.strip() for line in f if line.strip())) or None
+    except FileNotFoundError:
+        return None
+
+# ---------- Background pipeline jobs ----------
+# pipeline_main (matching, quiz generation, evaluation) takes many seconds of
+# LLM calls, so company_submit queues it here and the page polls /jobs/{id}.
+_PIPELINE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline")
+# Status of the most recent jobs only; the oldest entries are dropped past the cap
+_MAX_TRACKED_JOBS = 1000
+_JOBS: "OrderedDict[str, Future]" = OrderedDict()
+
+def _track_job(job_id: str, future: Future) -> None:
+    _JOBS[job_id] = future
+    while len(_JOBS) > _MAX_TRACKED_JOBS:
+        _JOBS.popitem(last=False)
+
+def _run_pipeline(job_id: str, **kwargs) -> None:
+    try:
+        pipeline_main(**kwargs)
+        logger.info("Pipeline job %s finished", job_id)
+    except Exception:
+        logger.exception("Pipeline job %s failed", job_id)
+        raise
+
+# ---------- Cached pages ----------
+# Static pages are rendered once at import and gzipped once at maximum level;
+# handlers only send the bytes, with an ETag so browsers can revalidate with a 304.
+def _cache_page(html: str) -> Tuple[bytes, bytes, str]:
+    body = html.encode("utf-8")
+    etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return body, gzip.compress(body, compresslevel=9, mtime=0), etag
+
+def _cached_page(request: Request, page: Tuple[bytes, bytes, str]) -> Response:
+    body, gz_body, etag = page
+    headers = {"Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body, etag = gz_body, etag + "-gz"
+        headers["Content-Encoding"] = "gzip"
+    headers["ETag"] = f'"{etag}"'
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="text/html", headers=headers)
+
+_LANDING_PAGE = _cache_page(templates.get_template("landing.html").render())
+_INDIVIDUAL_PAGE = _cache_page(templates.get_template("individual_form.html").render())
+_COMPANY_TEMPLATE = templates.get_template("company_form.html")
+_COMPANY_PAGE = _cache_page(_COMPANY_TEMPLATE.render(error=None))
+# error variant: pre-rendered around a marker, so only the message is escaped per request
+_COMPANY_ERROR_HEAD, _COMPANY_ERROR_TAIL = _COMPANY_TEMPLATE.render(error="\x00").split("\x00")
 
 # ---------- Pages ----------
 
 @app.get("/", response_class=HTMLResponse)
-def landing():
-    return f"""
-    <!doctype html><html><head><meta charset="utf-8"><title>Recruitment MVP</title>{BASE_STYLE}</head><body>
-      <img src="/static/nukhbah.png" alt="Nukhbah Logo" class="logo">
-      <div class="wrap">
-        <div class="card">
-          <h1>Welcome</h1>
-          <p class="lead">Are you an individual or a company?</p>
-          <div class="row">
-            <a class="btn secondary" href="/individual">I am an individual</a>
-            <a class="btn secondary" href="/company">I am a company</a>
-          </div>
-          <div class="spacer"></div>
-        </div>
-      </div>
-    </body></html>
-    """
+def landing(request: Request):
+    return _cached_page(request, _LANDING_PAGE)
 
 # ---- Individual flow ----
 
 @app.get("/individual", response_class=HTMLResponse)
-def individual_form():
-    return f"""
-    <!doctype html><html><head><meta charset="utf-8"><title>Upload Resume</title>{BASE_STYLE}</head><body>
-      <img src="/static/nukhbah.png" alt="Nukhbah Logo" class="logo">
-      <div class="wrap">
-        <div class="card">
-          <h1>Upload your resume</h1>
-          <form class="grid" action="/individual/submit" method="post" enctype="multipart/form-data">
-            <div>
-              <label for="resume">Resume (PDF)</label>
-              <input id="resume" name="resume" type="file" accept=".pdf,.txt" required>
-            </div>
-            <div class="row">
-              <button class="btn" type="submit">Send resume</button>
-              <a class="btn secondary" href="/">Back</a>
-            </div>
-          </form>
-        </div>
-      </div>
-    </body></html>
-    """
+def individual_form(request: Request):
+    return _cached_page(request, _INDIVIDUAL_PAGE)
 
 @app.post("/individual/submit", response_class=HTMLResponse)
-async def individual_submit(resume: UploadFile):
-    filename = resume.filename if resume else "file"
+async def individual_submit(request: Request):
+    resume = _UploadTarget(f".{uuid4().hex}.part")
 
-    # 1) save uploaded file
+    # 1) stream uploaded file straight to disk
     try:
-        saved_path = _save_upload(resume, UPLOADS_DIR)
+        parser = StreamingFormDataParser(headers=request.headers)
+        parser.register("resume", resume)
+        async for chunk in request.stream():
+            await run_in_threadpool(parser.data_received, chunk)
+        saved_path, is_new = _finish_upload(resume)
+        if saved_path is None:
+            return HTMLResponse("<h3>No resume file was uploaded</h3>", status_code=400)
         logger.info("Saved CV to %s", saved_path)
+    except ParseFailedException:
+        resume.discard()
+        return HTMLResponse("<h3>Expected a multipart/form-data upload</h3>", status_code=400)
+    except ValidationError:
+        resume.discard()
+        return HTMLResponse("<h3>File is too large</h3>", status_code=413)
     except Exception as e:
+        resume.discard()
         logger.exception("Failed saving upload")
-        return HTMLResponse(f"<h3>Failed to save file: {e}</h3>", status_code=500)
+        return HTMLResponse(f"<h3>Failed to save file: {escape(str(e))}</h3>", status_code=500)
+    filename = Path(resume.multipart_filename).name
+    session = _session_id(request) or uuid4().hex
 
-    # 2) call your CV extractor pipeline (main.extract_cvs)
+    # 2) call your CV extractor pipeline (main.extract_cvs) in a worker thread,
+    #    so concurrent uploads are extracted in parallel instead of one by one;
+    #    an identical file was already extracted when it was first uploaded
     try:
-        cv_json_path = pipeline_extract_cvs([str(saved_path)])
-        logger.info("CV extraction invoked successfully -> %s", cv_json_path)
-        app.state.last_cv_files = [str(saved_path)]
+        if is_new:
+            cv_json_path = await run_in_threadpool(pipeline_extract_cvs, [str(saved_path)])
+            logger.info("CV extraction invoked successfully -> %s", cv_json_path)
+        else:
+            logger.info("CV %s already uploaded; skipping extraction", saved_path.name)
+        _add_session_cv(session, saved_path)
     except Exception as e:
         logger.exception("extract_cvs failed")
         # still show success UI per your spec, but you can change status if you want.
         pass
 
-    return f"""
-    <!doctype html><html><head><meta charset="utf-8"><title>Success</title>{BASE_STYLE}</head><body>
-      <img src="/static/nukhbah.png" alt="Nukhbah Logo" class="logo">
-      <div class="wrap">
-        <div class="card center">
-          <h1>Done</h1>
-          <p class="success">Resume sent successfuly</p>
-          <p class="lead">File received: <b>{filename}</b></p>
-          <div class="row" style="justify-content:center">
-            <a class="btn" href="/">Home</a>
-          </div>
-        </div>
-      </div>
-    </body></html>
-    """
+    response = HTMLResponse(templates.get_template("individual_done.html").render(filename=filename))
+    response.set_cookie(SESSION_COOKIE, session, httponly=True, samesite="lax")
+    return response
 
 # ---- Company flow ----
 
 @app.get("/company", response_class=HTMLResponse)
-def company_form(error: Optional[str] = None):
-    error_html = f'<p class="error">{error}</p>' if error else ""
-    return f"""
-    <!doctype html><html><head><meta charset="utf-8"><title>Company Intake</title>{BASE_STYLE}</head><body>
-      <img src="/static/nukhbah.png" alt="Nukhbah Logo" class="logo">
-      <div class="wrap">
-        <div class="card">
-          <h1>Company intake</h1>
-          <p class="lead">Fill in your company details and role focus.</p>
-          {error_html}
-          <form class="grid" action="/company/submit" method="post" enctype="multipart/form-data">
-            <div>
-              <label for="company_name">company name</label>
-              <input id="company_name" name="company_name" type="text" placeholder="e.g., SDAIA, SITE" required>
-            </div>
-            <div>
-              <label for="sector">sector</label>
-              <input id="sector" name="sector" type="text" placeholder="e.g., Healthcare, E-commerce" required>
-            </div>
-            <div>
-              <label>role (choose one via checkbox)</label>
-              <div class="choices">
-                <label><input type="checkbox" name="role" value="AI Engineer" onchange="singleCheck(this)"> AI Engineer</label>
-                <label><input type="checkbox" name="role" value="Software Engineer" onchange="singleCheck(this)"> Software Engineer</label>
-                <label><input type="checkbox" name="role" value="Cloud Engineer" onchange="singleCheck(this)"> Cloud Engineer</label>
-                <label><input type="checkbox" name="role" value="Cyber Security" onchange="singleCheck(this)"> Cyber Security</label>
-                <label><input type="checkbox" name="role" value="Fullstack Developer" onchange="singleCheck(this)"> Fullstack Developer</label>
-              </div>
-              <p class="lead" style="margin-top:8px;">(Only one checkbox can be selected.)</p>
-            </div>
-
-            <!-- AI Engineer dataset (CSV) — hidden by default -->
-            <div id="ai-dataset" style="display:none;">
-              <label for="dataset_csv">dataset (CSV) for test generation</label>
-              <input id="dataset_csv" name="dataset_csv" type="file" accept=".csv">
-            </div>
-
-            <div>
-              <label for="job_description">job description</label>
-              <textarea id="job_description" name="job_description" placeholder="Specify the technical details of the role, avoid unnessesary details like salary, location, etc." required></textarea>
-            </div>
-            <div class="row">
-              <button class="btn" type="submit">OK, Send</button>
-              <a class="btn secondary" href="/">Back</a>
-            </div>
-          </form>
-        </div>
-      </div>
-    </body></html>
-    """
+def company_form(request: Request, error: Optional[str] = None):
+    if error:
+        return HTMLResponse(_COMPANY_ERROR_HEAD + str(escape(error)) + _COMPANY_ERROR_TAIL)
+    return _cached_page(request, _COMPANY_PAGE)
+
+def _company_error(msg: str) -> RedirectResponse:
+    return RedirectResponse(f"/company?error={quote(msg)}", status_code=303)
 
 @app.post("/company/submit", response_class=HTMLResponse)
-async def company_submit(
-    request: Request,
-    company_name: str = Form(...),
-    sector: str = Form(...),
-    role: Optional[List[str]] = Form(None),
-    job_description: str = Form(...),
-    dataset_csv: UploadFile | None = File(None),
-):
-    # enforce exactly one role
-    selected = role or []
-    if len(selected) != 1:
-        return company_form(error="Please select exactly one role (checkbox).")
+async def company_submit(request: Request):
+    company_name_t, sector_t, job_description_t = ValueTarget(), ValueTarget(), ValueTarget()
+    role_t = ListTarget()
+    dataset_csv = _UploadTarget(f".{uuid4().hex}.part")
+
+    try:
+        parser = StreamingFormDataParser(headers=request.headers)
+        parser.register("company_name", company_name_t)
+        parser.register("sector", sector_t)
+        parser.register("role", role_t)
+        parser.register("job_description", job_description_t)
+        parser.register("dataset_csv", dataset_csv)
+        async for chunk in request.stream():
+            await run_in_threadpool(parser.data_received, chunk)
+    except ParseFailedException:
+        dataset_csv.discard()
+        return HTMLResponse("<h3>Expected a multipart/form-data submission</h3>", status_code=400)
+    except ValidationError:
+        dataset_csv.discard()
+        return HTMLResponse("<h3>Dataset CSV is too large</h3>", status_code=413)
+    except Exception as e:
+        dataset_csv.discard()
+        logger.exception("Failed reading company form")
+        return HTMLResponse(f"<h3>Failed to read form: {escape(str(e))}</h3>", status_code=500)
+
+    company_name = company_name_t.value.decode("utf-8")
+    sector = sector_t.value.decode("utf-8")
+    job_description = job_description_t.value.decode("utf-8")
+    if not (company_name and sector and job_description):
+        dataset_csv.discard()
+        return _company_error("Please fill in company name, sector and job description.")
+
+    # enforce exactly one known role
+    selected = [r.decode("utf-8") for r in role_t.value]
+    if len(selected) != 1 or selected[0] not in _VALID_ROLES:
+        dataset_csv.discard()
+        return _company_error("Please select exactly one role (checkbox).")
     role_val = selected[0]
 
-    # save CSV only if role == AI Engineer and a file provided
+    # keep CSV only if role == AI Engineer and a file provided
     dataset_path_str = None
-    if role_val == "AI Engineer" and dataset_csv and dataset_csv.filename:
-        try:
-            saved_ds = _save_upload(dataset_csv, UPLOADS_DIR)
+    if role_val == _AI_ROLE:
+        saved_ds, _ = _finish_upload(dataset_csv)
+        if saved_ds:
             dataset_path_str = str(saved_ds)
             logger.info("Saved dataset CSV to %s", saved_ds)
-        except Exception as e:
-            logger.exception("Failed saving dataset CSV")
-            return HTMLResponse(f"<h3>Failed to save dataset CSV: {e}</h3>", status_code=500)
+    else:
+        dataset_csv.discard()
 
-    # call your main pipeline (no CVs here; this endpoint drives JD-side)
-    try:
-        cv_list = getattr(app.state, "last_cv_files", None)
-        pipeline_main(
-            job_description=job_description,
-            sector=sector,
-            job_field=role_val,   # pass role as-is; your main() expects a string
-            cv_files=cv_list,        # CVs handled via /individual flow
-            data_path=dataset_path_str
-        )
-        logger.info("Pipeline main() invoked successfully")
-    except Exception as e:
-        logger.exception("pipeline_main failed")
-        # نعرض نجاح شكلي كما في الـMVP، لكن لو تبي ارجع 500 بدلها غيّر التالي:
-        pass
+    # CVs come from the /individual uploads made in this browser session
+    cv_files = _session_cvs(_session_id(request))
+    if cv_files is None:
+        logger.warning("No CVs uploaded in this session; the pipeline will skip CV matching")
 
-    return f"""
-    <!doctype html><html><head><meta charset="utf-8"><title>Received</title>{BASE_STYLE}</head><body>
-      <img src="/static/nukhbah.png" alt="Nukhbah Logo" class="logo">
-      <div class="wrap">
-        <div class="card">
-          <h1>Submission received</h1>
-          <p class="success">Your company info was received (placeholder).</p>
-          <div class="grid">
-            <div><label>company name</label><div>{company_name}</div></div>
-            <div><label>sector</label><div>{sector}</div></div>
-            <div><label>role</label><div>{role_val}</div></div>
-            <div><label>job description</label><div><pre style="white-space:pre-wrap">{job_description}</pre></div></div>
-            {"<div><label>dataset</label><div>"+dataset_csv.filename+"</div></div>" if dataset_path_str else ""}
-          </div>
-          <div class="spacer"></div>
-          <div class="row">
-            <a class="btn" href="/">Home</a>
-            <a class="btn secondary" href="/company">New company</a>
-          </div>
-        </div>
-      </div>
-    </body></html>
-    """
+    # queue your main pipeline (no CVs here; this endpoint drives JD-side)
+    job_id = uuid4().hex
+    _track_job(job_id, _PIPELINE_EXECUTOR.submit(
+        _run_pipeline,
+        job_id,
+        job_description=job_description,
+        sector=sector,
+        job_field=role_val,   # pass role as-is; your main() expects a string
+        cv_files=cv_files,   # CVs handled via /individual flow
+        data_path=dataset_path_str
+    ))
+    logger.info("Pipeline job %s queued", job_id)
+
+    return templates.get_template("company_received.html").render(
+        company_name=company_name,
+        sector=sector,
+        role=role_val,
+        job_description=job_description,
+        dataset=Path(dataset_csv.multipart_filename).name if dataset_path_str else None,
+        job_id=job_id,
+    )
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    future = _JOBS.get(job_id)
+    if future is None:
+        return JSONResponse({"status": "unknown"}, status_code=404)
+    if future.running():
+        status = "running"
+    elif not future.done():
+        status = "queued"
+    else:
+        status = "failed" if future.exception() else "done"
+    return {"status": status}
 
 # ---- Health check ----
 @app.get("/healthz")
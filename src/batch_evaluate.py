@@ -0,0 +1,136 @@
+"""
+Offline LLM-as-a-Judge evaluation of the Kaggle dataset through the OpenAI
+Batch API: all judge requests go up as one JSONL file and come back within
+the batch completion window, at half the per-token price of live calls.
+"""
+import itertools
+import time
+import orjson
+from src.infra.gpt_client import get_gpt_client
+from src.infra.llm_cache import get_llm_cache
+from src.evaluate_quiz import (
+    cached_verdict,
+    iter_judge_dataset,
+    judge_cache_key,
+    judge_request,
+    parse_content,
+    save_judge_results,
+    store_verdict,
+)
+
+BATCH_INPUT_FILE = "llm_judge_batch_input.jsonl"
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_POLL_SECONDS = 60
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def submit_batch(questions, answers, role: str):
+    """
+    Uploads one judge request per uncached (question, answer) pair and starts a batch.
+    The cache key is used as custom_id, so near-duplicate pairs are sent once.
+    Returns the batch id, or None if every pair is already cached.
+    """
+    cache = get_llm_cache()
+    pending = {}
+    for question, answer in zip(questions, answers):
+        key = judge_cache_key(question, answer, role)
+        if key not in pending and cached_verdict(cache, key) is None:
+            pending[key] = judge_request(question, answer, role)
+
+    if not pending:
+        return None
+
+    with open(BATCH_INPUT_FILE, "wb") as f:
+        for key, body in pending.items():
+            line = {"custom_id": key, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+            f.write(orjson.dumps(line) + b"\n")
+
+    client = get_gpt_client()
+    with open(BATCH_INPUT_FILE, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h"
+    )
+    print(f"Submitted batch {batch.id} with {len(pending)} requests.")
+    return batch.id
+
+
+def wait_for_batch(batch_id: str, poll_seconds: int = BATCH_POLL_SECONDS):
+    """Polls the batch until it reaches a terminal status and returns it."""
+    client = get_gpt_client()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts is not None:
+            print(f"Batch {batch_id}: {batch.status} ({counts.completed}/{counts.total} done)")
+        if batch.status in BATCH_TERMINAL_STATUSES:
+            return batch
+        time.sleep(poll_seconds)
+
+
+def collect_batch_results(batch):
+    """
+    Downloads the batch output and returns {custom_id: evaluation}. Valid verdicts are
+    also stored in the LLM cache under their custom_id. Expired batches still return
+    their finished requests.
+    """
+    results = {}
+    if batch.output_file_id is None:
+        print(f"Batch {batch.id} ended as '{batch.status}' without output.")
+        return results
+
+    cache = get_llm_cache()
+    output = get_gpt_client().files.content(batch.output_file_id)
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            print(f"Request {record['custom_id']} failed: {record.get('error') or response.get('body')}")
+            continue
+
+        choice = response["body"]["choices"][0]
+        if choice.get("finish_reason") == "length":
+            print(f"Request {record['custom_id']} failed: reply was cut off at max_tokens")
+            continue
+
+        evaluation_json, cacheable = parse_content(choice["message"]["content"])
+        store_verdict(cache, record["custom_id"], evaluation_json, cacheable)
+        results[record["custom_id"]] = evaluation_json
+
+    return results
+
+
+def evaluate_dataset_with_batch(role="Software Engineer"):
+    """
+    Batch API counterpart of evaluate_dataset_with_judge: submits the whole dataset,
+    waits for the batch and writes the same results file.
+    """
+    # The batch needs every request up front, so all chunks are read before submitting
+    chunks = list(iter_judge_dataset())
+    questions = itertools.chain.from_iterable(chunk[0] for chunk in chunks)
+    answers = itertools.chain.from_iterable(chunk[1] for chunk in chunks)
+
+    batch_id = submit_batch(questions, answers, role)
+    fresh = collect_batch_results(wait_for_batch(batch_id)) if batch_id is not None else {}
+
+    cache = get_llm_cache()
+
+    def cached_evaluations(questions, answers):
+        for question, answer in zip(questions, answers):
+            key = judge_cache_key(question, answer, role)
+            evaluation = cached_verdict(cache, key) or fresh.get(key)
+            yield evaluation if evaluation is not None else RuntimeError("No batch result")
+
+    save_judge_results(
+        (questions, answers, diffs, cats, cached_evaluations(questions, answers))
+        for questions, answers, diffs, cats in chunks
+    )
+
+
+if __name__ == "__main__":
+    evaluate_dataset_with_batch(role="Software Engineer")
@@ -1,33 +1,38 @@
 
-import json
+import orjson
+from datetime import datetime
 from pathlib import Path
 
-def store_candidate_answer(candidate_id: str, question: str, answer: str, 
-                          output_file: str = "candidate_answers.json"):
-    """Store a candidate's answer to a quiz question."""
-    
- 
-    answers_file = Path(output_file)
-    if answers_file.exists():
-        with open(answers_file, 'r') as f:
-            all_answers = json.load(f)
-    else:
-        all_answers = {}
-    
-    # Store answer
-    if candidate_id not in all_answers:
-        all_answers[candidate_id] = []
-    
-    all_answers[candidate_id].append({
+def store_candidate_answer(candidate_id: str, question: str, answer: str,
+                          output_file: str = "candidate_answers.jsonl"):
+    """Store a candidate's answer to a quiz question (one JSON line per answer)."""
+
+    record = {
+        "candidate_id": candidate_id,
         "question": question,
         "answer": answer,
-        "timestamp": str(pd.Timestamp.now())
-    })
-    
-   
-    with open(answers_file, 'w') as f:
-        json.dump(all_answers, f, indent=2)
-    
+        "timestamp": datetime.now().isoformat()
+    }
+
+    # Append-only: no need to read back and rewrite the existing answers
+    with open(output_file, 'ab') as f:
+        f.write(orjson.dumps(record) + b"\n")
+
     return output_file
 
 
+def load_candidate_answers(answers_file: str = "candidate_answers.jsonl") -> dict:
+    """Read stored answers grouped by candidate_id, in the order they were given."""
+    all_answers = {}
+    if not Path(answers_file).exists():
+        return all_answers
+
+    with open(answers_file, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            all_answers.setdefault(record.pop("candidate_id"), []).append(record)
+
+    return all_answers
+
@@ -1,31 +1,152 @@
 # embeddings + cosine similarity 
 
-import json
-from sentence_transformers import SentenceTransformer, util
+import functools
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import orjson
+import torch
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
 from src.config_candidate import SIMILARITY_THRESHOLD, CHUNK_SIZE, OVERLAP
 
 #  Load model once globally 
-model = SentenceTransformer("lwolfrum2/careerbert-jg")
+# On a GPU: the PyTorch model in float16 (tensor cores, half the memory traffic).
+# On CPU: ONNX Runtime backend with dynamic INT8 quantization (AVX512-VNNI
+# kernels); the first run exports the ONNX graph and the quantized copy into
+# ONNX_MODEL_DIR, later runs load it. Either way the encode() API is the same.
+MODEL_NAME = "lwolfrum2/careerbert-jg"
+ONNX_MODEL_DIR = Path("models") / "careerbert-jg-onnx"
+QUANTIZED_MODEL_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+MODEL_VARIANT = "cuda-fp16" if DEVICE == "cuda" else QUANTIZED_MODEL_FILE
+
+
+def _load_model():
+    if DEVICE == "cuda":
+        return SentenceTransformer(MODEL_NAME, device=DEVICE).half()
+    if not (ONNX_MODEL_DIR / QUANTIZED_MODEL_FILE).exists():
+        base_model = SentenceTransformer(MODEL_NAME, backend="onnx")
+        base_model.save_pretrained(str(ONNX_MODEL_DIR))
+        export_dynamic_quantized_onnx_model(base_model, "avx512_vnni", str(ONNX_MODEL_DIR))
+    return SentenceTransformer(
+        str(ONNX_MODEL_DIR), backend="onnx", model_kwargs={"file_name": QUANTIZED_MODEL_FILE}
+    )
+
+
+model = _load_model()
+
+# CV and JD embeddings cached on disk, one float16 .npy per text, keyed by a hash
+# of the model (name + variant) and the text's chunks (any edit changes the key)
+EMBEDDINGS_CACHE_DIR = Path("embeddings_cache")
 
 
 def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=OVERLAP):
     words = text.split()
     if not words:
         return []
-    chunks = []
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk = words[i:i + chunk_size]
-        if len(chunk) < chunk_size:  # padding if CV text less than job description
-            chunk += ["[PAD]"] * (chunk_size - len(chunk))
-        chunks.append(" ".join(chunk))
-    return chunks
+    # no manual [PAD] words: the tokenizer pads each batch itself and mean
+    # pooling ignores padded positions via the attention mask
+    return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size - overlap)]
+
+
+@functools.lru_cache(maxsize=512)
+def _encode_jd(job_text):
+    """Unit-normalized JD chunk embeddings; repeated job postings skip the encode,
+    in memory within a process and via the disk cache across runs."""
+    jd_embeddings, _ = encode_chunks_cached([chunk_text(job_text)])
+    # similarity is computed in float32 so the threshold means the same on every backend
+    return torch.nn.functional.normalize(jd_embeddings.to(DEVICE), dim=1)
+
+
+def _embedding_cache_key(chunks):
+    h = hashlib.sha256(f"{MODEL_NAME}:{MODEL_VARIANT}".encode("utf-8"))
+    for chunk in chunks:
+        h.update(b"\0")
+        h.update(chunk.encode("utf-8"))
+    return h.hexdigest()
+
+
+def encode_chunks_cached(chunk_lists):
+    """Return (float32 embeddings, offsets) for all texts; only cache misses hit the model."""
+    EMBEDDINGS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    paths = [EMBEDDINGS_CACHE_DIR / f"{_embedding_cache_key(chunks)}.npy" for chunks in chunk_lists]
+
+    embeddings = [None] * len(chunk_lists)
+    misses = []
+    for i, path in enumerate(paths):
+        try:
+            embeddings[i] = np.load(path)
+        except (FileNotFoundError, ValueError):
+            misses.append(i)
+
+    if misses:
+        # Encode all missing texts' chunks in one batched call, then slice per text
+        miss_offsets = np.cumsum([0] + [len(chunk_lists[i]) for i in misses])
+        miss_chunks = [chunk for i in misses for chunk in chunk_lists[i]]
+        encoded = model.encode(miss_chunks, batch_size=64, convert_to_numpy=True, show_progress_bar=False)
+        for j, i in enumerate(misses):
+            emb = encoded[miss_offsets[j]:miss_offsets[j + 1]].astype(np.float16)
+            tmp_path = paths[i].with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, emb)
+            os.replace(tmp_path, paths[i])
+            embeddings[i] = emb
+
+    offsets = np.cumsum([0] + [len(chunks) for chunks in chunk_lists])
+    return torch.from_numpy(np.concatenate(embeddings).astype(np.float32)), offsets
+
+
+def _iter_tokens(cv_data):
+    """Yield the CV's text pieces in section order, for one " ".join."""
+    # Summary
+    yield cv_data.get("summary", "")
+
+    # Experience
+    for exp in cv_data.get("work_experience") or []:
+        responsibilities = exp.get("responsibilities", [])
+        if isinstance(responsibilities, list):
+            yield from responsibilities
+
+    # Technical skills
+    skills_list = cv_data.get("technical_skills", [])
+    if isinstance(skills_list, list):
+        yield from skills_list
+
+    # Education
+    for edu in cv_data.get("education") or []:
+        yield edu.get("degree", "")
+        yield edu.get("field", "")
+
+    # Certifications
+    for cert in cv_data.get("certifications") or []:
+        yield cert.get("name", "")
+
+    # Projects
+    for proj in cv_data.get("projects") or []:
+        yield f"{proj.get('name','')} {proj.get('description','')}"
+
+    # Soft skills
+    soft_skills = cv_data.get("soft_skills", [])
+    if isinstance(soft_skills, list):
+        yield from soft_skills
+
+    # Languages
+    for lang in cv_data.get("languages") or []:
+        yield f"{lang.get('language','')} {lang.get('proficiency','')}"
+
+    # Interests
+    interests = cv_data.get("interests", [])
+    if isinstance(interests, list):
+        yield from interests
 
 
 def match_candidates(cvs_data, job_description: str, job_field: str, output_path: str = "qualified_candidates.json"):
     # Load CVs
     if isinstance(cvs_data, str):
-        with open(cvs_data, "r", encoding="utf-8") as f:
-            cvs_data = json.load(f)
+        with open(cvs_data, "rb") as f:
+            cvs_data = orjson.loads(f.read())
 
     if not isinstance(cvs_data, list):
         raise ValueError("cvs_data must be a list of dictionaries")
@@ -37,94 +158,59 @@ def match_candidates(cvs_data, job_description: str, job_field: str, output_path
     job_text = f"{job_field} {job_description}".strip()
 
     # Encode job description chunks
-    jd_chunks = chunk_text(job_text)
-    jd_embeddings = model.encode(jd_chunks, convert_to_tensor=True)
+    jd_embeddings = _encode_jd(job_text)
 
-    qualified_candidates = []
+    # Build every candidate's CV text first, so all chunks go through one encode call
+    candidates = []
+    chunk_lists = []
 
     for cv_data in cvs_data:
         if not isinstance(cv_data, dict):
             continue
 
-        cv_sections = []
-
-        # Summary
-        summary = cv_data.get("summary", "")
-        if summary:
-            cv_sections.append(summary)
-
-        # Experience
-        experience = []
-        for exp in cv_data.get("work_experience", []):
-            responsibilities = exp.get("responsibilities", [])
-            if isinstance(responsibilities, list):
-                experience.extend(responsibilities)
-        cv_sections.append(" ".join(experience))
-
-        # Technical skills
-        skills_list = cv_data.get("technical_skills", [])
-        if isinstance(skills_list, list):
-            cv_sections.append(" ".join(skills_list))
-
-        # Education
-        education_list = []
-        for edu in cv_data.get("education", []):
-            degree = edu.get("degree", "")
-            field = edu.get("field", "")
-            if degree or field:
-                education_list.append(f"{degree} {field}".strip())
-        cv_sections.append(" ".join(education_list))
-
-        # Certifications
-        certs_list = [cert.get("name", "") for cert in cv_data.get("certifications", [])]
-        cv_sections.append(" ".join(certs_list))
-
-        # Projects
-        projects_list = [f"{proj.get('name','')} {proj.get('description','')}" 
-                         for proj in cv_data.get("projects", [])]
-        cv_sections.append(" ".join(projects_list))
-
-        # Soft skills
-        soft_skills = cv_data.get("soft_skills", [])
-        if isinstance(soft_skills, list):
-            cv_sections.append(" ".join(soft_skills))
-
-        # Languages
-        langs = [f"{lang.get('language','')} {lang.get('proficiency','')}" for lang in cv_data.get("languages", [])]
-        cv_sections.append(" ".join(langs))
-
-        # Interests
-        interests = cv_data.get("interests", [])
-        if isinstance(interests, list):
-            cv_sections.append(" ".join(interests))
-
-        cv_text = " ".join([section for section in cv_sections if section.strip()])
+        cv_text = " ".join(token for token in _iter_tokens(cv_data) if token)
         if not cv_text.strip():
             continue
 
-        # Encode CV chunks
-        cv_chunks = chunk_text(cv_text, chunk_size=CHUNK_SIZE, overlap=OVERLAP)
-        cv_embeddings = model.encode(cv_chunks, convert_to_tensor=True)
+        candidates.append(cv_data)
+        chunk_lists.append(chunk_text(cv_text, chunk_size=CHUNK_SIZE, overlap=OVERLAP))
+
+    qualified_candidates = []
 
-        # cosine similarity
-        similarity_matrix = util.cos_sim(cv_embeddings, jd_embeddings)
+    if candidates:
+        # Encode (or load cached) CV chunks, then slice per candidate
+        all_embeddings, offsets = encode_chunks_cached(chunk_lists)
+        all_embeddings = all_embeddings.to(jd_embeddings.device)
+
+        # cosine similarity for every CV chunk vs every JD chunk: unit-normalize
+        # once (JD embeddings already are), then a single matmul over the whole corpus
+        all_embeddings = torch.nn.functional.normalize(all_embeddings, dim=1)
+        similarity_matrix = all_embeddings @ jd_embeddings.T
+
+        # candidate score = mean over its CV chunks of the best JD-chunk match,
+        # computed for all candidates at once by a segment mean over the rows
+        device = similarity_matrix.device
+        chunk_counts = torch.from_numpy(np.diff(offsets)).to(device)
+        segment_ids = torch.repeat_interleave(torch.arange(len(candidates), device=device), chunk_counts)
         max_per_cv_chunk = similarity_matrix.max(dim=1).values
-        final_similarity = max_per_cv_chunk.mean().item()
+        scores = torch.zeros(len(candidates), device=device).scatter_reduce_(
+            0, segment_ids, max_per_cv_chunk, reduce="mean", include_self=False
+        )
 
-        candidate_name = cv_data.get("name", "Unknown")
+        # threshold + sort on-device, move to Python only for the JSON output
+        keep = (scores >= SIMILARITY_THRESHOLD).nonzero().squeeze(1)
+        order = keep[scores[keep].argsort(descending=True)]
 
-        if final_similarity >= SIMILARITY_THRESHOLD:
+        for i, final_similarity in zip(order.tolist(), scores[order].tolist()):
+            cv_data = candidates[i]
             qualified_candidates.append({
-                "full_name": candidate_name,
+                "full_name": cv_data.get("name", "Unknown"),
                 "email": cv_data.get("contact", {}).get("email", ""),
                 "similarity_score": round(final_similarity, 3)
             })
 
-    # Sort candidates
-    qualified_candidates = sorted(qualified_candidates, key=lambda x: x["similarity_score"], reverse=True)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(qualified_candidates, f, ensure_ascii=False, indent=4)
+    with open(output_path, "wb") as f:
+        f.write(orjson.dumps(qualified_candidates))
 
     return qualified_candidates
 
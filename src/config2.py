@@ -70,6 +70,16 @@ class Config:
         """Get max tokens for API calls"""
         return self.config.getint('Settings', 'MAX_TOKENS', fallback=4000)
     
+    @property
+    def max_workers(self):
+        """Get number of CVs processed concurrently"""
+        return self.config.getint('Settings', 'MAX_WORKERS', fallback=8)
+    
+    @property
+    def requests_per_minute(self):
+        """Get OpenAI request budget shared by all workers"""
+        return self.config.getint('Settings', 'REQUESTS_PER_MINUTE', fallback=60)
+    
     @property
     def output_dir(self):
         """Get output directory path"""
@@ -89,6 +99,8 @@ class Config:
         print(f"Model: {self.model}")
         print(f"Temperature: {self.temperature}")
         print(f"Max Tokens: {self.max_tokens}")
+        print(f"Max Workers: {self.max_workers}")
+        print(f"Requests/Minute: {self.requests_per_minute}")
         print(f"Output Directory: {self.output_dir}")
         print(f"Upload Directory: {self.upload_dir}")
         print(f"API Key: {'*' * 20} (hidden)")
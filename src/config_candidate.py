@@ -26,10 +26,7 @@ config = configparser.ConfigParser()
 config.read(".env")
 config.read(".env")
 
-SIMILARITY_THRESHOLD= config["Settings"]["SIMILARITY_THRESHOLD"]
-CHUNK_SIZE = config["Settings"]["CHUNK_SIZE"]
-OVERLAP = config["Settings"]["OVERLAP"]
-SIMILARITY_THRESHOLD= config["Settings"]["SIMILARITY_THRESHOLD"]
-CHUNK_SIZE = config["Settings"]["CHUNK_SIZE"]
-OVERLAP = config["Settings"]["OVERLAP"]
+SIMILARITY_THRESHOLD= float(config["Settings"]["SIMILARITY_THRESHOLD"])
+CHUNK_SIZE = int(config["Settings"]["CHUNK_SIZE"])
+OVERLAP = int(config["Settings"]["OVERLAP"])
 
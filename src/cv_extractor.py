@@ -7,18 +7,24 @@ Uses OpenAI Vision API with secure configuration from .env file
 """
 
 import base64
+import os
 from src.config2 import Config
-import json
+from src.infra.rate_limiter import RateLimiter
+import orjson
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List
 from openai import OpenAI
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import logging
 import configparser 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Serializes PyMuPDF use across the threads of process_batch
+_FITZ_LOCK = threading.Lock()
+
 class CVExtractor:
     """
     CV Extraction Pipeline
@@ -26,17 +32,22 @@ class CVExtractor:
     Reads API key securely from config
     """
     
+    # Page render resolution for the vision call; raise to ~130 if small
+    # Arabic text stops being read reliably
+    RENDER_DPI = 110
+    
     # Enhanced extraction prompt - all skills together, exact dates only
-    EXTRACTION_PROMPT = """Extract all information from this CV/Resume image and return it as JSON.
+    EXTRACTION_PROMPT = """Extract all information from these CV/Resume page images and return it as ONE JSON.
 
 CRITICAL RULES:
 1. Perform OCR to read all text (support both Arabic and English)
 2. Clean and correct OCR errors ONLY (fix typos like "J o h n" → "John")
-3. Extract ONLY information that is VISIBLE in the image
+3. Extract ONLY information that is VISIBLE in the images
 4. DO NOT add, invent, assume, or make up ANY information
 5. DO NOT calculate or infer dates - use EXACT dates from CV or null
 6. If information is unclear or missing, use null
 7. For technical skills: combine ALL skills into ONE array
+8. The images are consecutive pages of the SAME CV: combine them into one CV and remove duplicates
 
 Return this exact JSON structure:
 
@@ -127,7 +138,11 @@ REMEMBER:
         self.config = config
         
         # Initialize OpenAI client with API key from config
-        self.client = OpenAI(api_key=config.api_key)
+        # (the client retries 429/5xx itself with exponential backoff)
+        self.client = OpenAI(api_key=config.api_key, max_retries=5)
+        
+        # One request budget for all threads in process_batch
+        self.rate_limiter = RateLimiter(config.requests_per_minute)
         
         # Setup output directories from config
         self.raw_dir = config.output_dir / "raw_text"
@@ -154,61 +169,76 @@ REMEMBER:
         """
         try:
             import fitz  # PyMuPDF
-            from io import BytesIO
             from PIL import Image
             
-            pdf_document = fitz.open(pdf_path)
-            base64_images = []
+            # MuPDF is not thread-safe (process_batch runs CVs on several
+            # threads), so pages are rendered under a lock; the JPEG encoding,
+            # which releases the GIL, then runs in parallel across pages
+            page_images = []
+            with _FITZ_LOCK:
+                pdf_document = fitz.open(pdf_path)
+                try:
+                    for page in pdf_document:
+                        # Get page and convert to image
+                        # (grayscale at RENDER_DPI: CVs are dark text on white, and
+                        # the smaller payload is what the upload time depends on)
+                        zoom = self.RENDER_DPI / 72
+                        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY)
+                        page_images.append(Image.frombytes("L", [pix.width, pix.height], pix.samples))
+                finally:
+                    pdf_document.close()
             
-            for page_num in range(pdf_document.page_count):
-                # Get page and convert to image
-                page = pdf_document[page_num]
-                pix = page.get_pixmap(matrix=fitz.Matrix(150/72, 150/72))
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                
-                # Convert to base64
-                buffered = BytesIO()
-                img.save(buffered, format="JPEG", quality=85)
-                img_base64 = base64.b64encode(buffered.getvalue()).decode()
-                base64_images.append(img_base64)
+            if not page_images:
+                return []
             
-            pdf_document.close()
-            return base64_images
+            with ThreadPoolExecutor(max_workers=min(8, len(page_images))) as executor:
+                return list(executor.map(self._encode_page, page_images))
             
         except Exception as e:
             print(f"Error converting PDF to images: {e}")
             return []
     
-    def extract_from_image(self, image_base64: str) -> Optional[Dict]:
+    @staticmethod
+    def _encode_page(img) -> str:
+        """Convert a rendered page image to base64 JPEG"""
+        from io import BytesIO
+        
+        buffered = BytesIO()
+        img.save(buffered, format="JPEG", quality=75, optimize=True)
+        return base64.b64encode(buffered.getvalue()).decode()
+    
+    def extract_from_images(self, images_base64: List[str]) -> Optional[Dict]:
         """
-        Extract CV data from single image using OpenAI Vision
+        Extract CV data from all page images in one OpenAI Vision call
+        The model sees every page at once, so no separate merge step is needed
         Uses model and settings from secure config
         
         Args:
-            image_base64: Base64 encoded image string
+            images_base64: Base64 encoded image strings, one per page
             
         Returns:
             Extracted CV data as dictionary or None if failed
         """
+        content = [{"type": "text", "text": self.EXTRACTION_PROMPT}]
+        content += [
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{image_base64}",
+                    "detail": "high"
+                }
+            }
+            for image_base64 in images_base64
+        ]
+        
         try:
+            self.rate_limiter.acquire()
             response = self.client.chat.completions.create(
                 model=self.config.model,
                 messages=[
                     {
                         "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": self.EXTRACTION_PROMPT
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_base64}",
-                                    "detail": "high"
-                                }
-                            }
-                        ]
+                        "content": content
                     }
                 ],
                 max_tokens=self.config.max_tokens,
@@ -216,69 +246,17 @@ REMEMBER:
                 response_format={"type": "json_object"}
             )
             
-            cv_data = json.loads(response.choices[0].message.content)
+            cv_data = orjson.loads(response.choices[0].message.content)
             return cv_data
             
         except Exception as e:
-            print(f"Error extracting data from image: {e}")
+            print(f"Error extracting data from images: {e}")
             return None
     
-    def merge_pages(self, page_data_list: List[Dict]) -> Optional[Dict]:
-        """
-        Merge CV data from multiple pages into one complete CV
-        Uses cheaper model for merging to save costs
-        
-        Args:
-            page_data_list: List of CV data dictionaries from each page
-            
-        Returns:
-            Merged CV data dictionary or None if failed
-        """
-        if not page_data_list:
-            return None
-        
-        if len(page_data_list) == 1:
-            return page_data_list[0]
-        
-        try:
-            merge_prompt = f"""Merge these CV data from multiple pages into ONE complete CV.
-
-RULES:
-- Remove duplicates
-- Combine related information intelligently
-- Keep the most complete and accurate data
-- DO NOT add or invent any information
-- Keep exact dates and information as they are
-- Combine technical_skills arrays into one complete array
-
-Pages data:
-{json.dumps(page_data_list, indent=2, ensure_ascii=False)}
-
-Return ONE merged JSON with the same structure."""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Use cheaper model for merging
-                messages=[
-                    {
-                        "role": "user",
-                        "content": merge_prompt
-                    }
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"}
-            )
-            
-            merged_data = json.loads(response.choices[0].message.content)
-            return merged_data
-            
-        except Exception as e:
-            print(f"Error merging pages, using first page data: {e}")
-            return page_data_list[0]
-    
     def process_cv(self, pdf_path: str) -> Optional[Dict]:
         """
         Main CV processing pipeline
-        PDF -> Images -> Extract -> Merge -> Save
+        PDF -> Images -> Extract -> Save
         
         Args:
             pdf_path: Path to CV PDF file
@@ -305,47 +283,33 @@ Return ONE merged JSON with the same structure."""
         
         print(f"Successfully converted {len(images)} page(s)")
         
-        # Step 2: Extract data from each page
-        print("\nStep 2: Extracting data from pages...")
-        page_data_list = []
-        for i, img in enumerate(images, 1):
-            print(f"  Extracting page {i}/{len(images)}...")
-            data = self.extract_from_image(img)
-            if data:
-                page_data_list.append(data)
-                print(f"  Page {i} extracted successfully")
-            else:
-                print(f"  Failed to extract page {i}")
-        
-        if not page_data_list:
-            print("Error: No data extracted from any page")
-            return None
-        
-        # Step 3: Merge multi-page data
-        print("\nStep 3: Merging pages...")
-        final_data = self.merge_pages(page_data_list)
+        # Step 2: Extract data from all pages in one call
+        print("\nStep 2: Extracting data from all pages...")
+        final_data = self.extract_from_images(images)
         
         if not final_data:
-            print("Error: Failed to merge page data")
+            print("Error: No data extracted from the CV")
             return None
         
-        # Step 4: Add metadata
+        print(f"  {len(images)} page(s) extracted successfully")
+        
+        # Step 3: Add metadata
         final_data['filename'] = pdf_path.name
         final_data['extraction_timestamp'] = datetime.now().isoformat()
         final_data['extraction_method'] = f'OpenAI Vision ({self.config.model})'
         final_data['total_pages'] = len(images)
         
-        # Step 5: Save raw text for reference
+        # Step 4: Save raw text for reference
         raw_text = self._generate_raw_text(final_data)
         raw_file = self.raw_dir / f"{pdf_path.stem}_raw.txt"
         with open(raw_file, 'w', encoding='utf-8') as f:
             f.write(raw_text)
         print(f"\nRaw text saved: {raw_file.name}")
         
-        # Step 6: Save structured JSON
+        # Step 5: Save structured JSON (pretty-printed: this one is read by people)
         json_file = self.json_dir / f"{pdf_path.stem}.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=2, ensure_ascii=False)
+        with open(json_file, 'wb') as f:
+            f.write(orjson.dumps(final_data, option=orjson.OPT_INDENT_2))
         print(f"JSON saved: {json_file.name}")
         
         # Display summary
@@ -383,34 +347,44 @@ Return ONE merged JSON with the same structure."""
         
         return "\n".join(lines)
     
-    def process_batch(self, pdf_paths: List[str]) -> List[Dict]:
+    def process_batch(self, pdf_paths: List[str],
+                      on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
         """
         Process multiple CV files in batch
+        CVs are processed concurrently; the shared rate limiter keeps
+        the OpenAI calls within the configured requests per minute
         
         Args:
             pdf_paths: List of PDF file paths
+            on_result: Called with each extracted CV as soon as it is done
+                (always from the calling thread)
             
         Returns:
-            List of successfully extracted CV data
+            List of successfully extracted CV data (in input order)
         """
-        results = []
         total = len(pdf_paths)
         
         print(f"\n{'='*60}")
-        print(f"BATCH PROCESSING: {total} CVs")
+        print(f"BATCH PROCESSING: {total} CVs ({self.config.max_workers} workers)")
         print(f"{'='*60}\n")
         
-        for i, path in enumerate(pdf_paths, 1):
-            print(f"\n[CV {i}/{total}]")
-            result = self.process_cv(path)
-            
-            if result:
-                results.append(result)
-            
-            # Rate limiting between requests
-            if i < total:
-                print("\nWaiting 2 seconds before next CV...")
-                time.sleep(2)
+        results_by_index = {}
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            futures = {executor.submit(self.process_cv, path): i for i, path in enumerate(pdf_paths)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error processing {pdf_paths[i]}: {e}")
+                    result = None
+                if result:
+                    results_by_index[i] = result
+                    if on_result:
+                        on_result(result)
+                print(f"\n[CV {done}/{total} done]")
+        
+        results = [results_by_index[i] for i in sorted(results_by_index)]
         
         print(f"\n{'='*60}")
         print(f"BATCH COMPLETE")
@@ -432,15 +406,45 @@ def extract_cvs(cv_files: list) -> str:
         logger.error("No valid CV files found")
         return None
 
-    extracted_cvs = extractor.process_batch(valid_files)
-    
-    cv_data_dict = {cv.get('filename'): cv for cv in extracted_cvs}
+    # One JSON line per CV, appended as each CV finishes: a crash midway keeps
+    # the CVs already done, and nothing already on disk is rewritten
+    output_file = config.output_dir / "all_extracted_cvs.jsonl"
+    with open(output_file, 'ab') as f:
+        # terminate a partial last line from an interrupted run, so the next
+        # record starts on its own line
+        if f.tell() and not _ends_with_newline(output_file):
+            f.write(b"\n")
 
-    output_file = config.output_dir / "all_extracted_cvs.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(cv_data_dict, f, indent=2, ensure_ascii=False)
+        def write_cv(cv: Dict):
+            f.write(orjson.dumps(cv, option=orjson.OPT_NON_STR_KEYS) + b"\n")
+            f.flush()
+        
+        extracted_cvs = extractor.process_batch(valid_files, on_result=write_cv)
 
-    logger.info(f"Extracted {len(cv_data_dict)} CVs: {output_file}")
+    logger.info(f"Extracted {len(extracted_cvs)} CVs: {output_file}")
 
     return str(output_file)
 
+
+def _ends_with_newline(path: Path) -> bool:
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def load_extracted_cvs(cv_file_path: str) -> Dict[str, Dict]:
+    """Read all_extracted_cvs.jsonl into {filename: cv}; a later line for
+    the same file (re-extraction) replaces the earlier one. Unreadable lines,
+    such as a partial last line left by an interrupted run, are skipped."""
+    cvs = {}
+    with open(cv_file_path, 'rb') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                cv = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                logger.warning("Skipping unreadable line %d in %s", line_no, cv_file_path)
+                continue
+            cvs[cv.get('filename')] = cv
+    return cvs
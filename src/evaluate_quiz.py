@@ -1,56 +1,208 @@
+import asyncio
+import functools
 import json
 import kagglehub
+import orjson
 import pandas as pd
+import re
 from pathlib import Path
-from src.infra.gpt_client import get_gpt_client
+from tqdm import tqdm
+from src.infra.gpt_client import get_async_gpt_client, get_gpt_client
+from src.infra.llm_cache import get_llm_cache
+from src.infra.rate_limiter import AsyncTokenBucket
 from src.evaluation_criteria import EVALUATION_CRITERIA
 from src.evaluation_config import EVALUATION_PROMPT
 
 gpt_client = get_gpt_client()
 
+# Max judge requests in flight at once for dataset-wide evaluation
+JUDGE_CONCURRENCY = 20
+# Judge requests started per minute, kept under the account's RPM limit so
+# bursts don't turn into a storm of 429 retries
+JUDGE_REQUESTS_PER_MINUTE = 500
+RESULTS_FILE = "llm_judge_evaluation_results.jsonl"
+# Dataset rows read (and evaluated) at a time
+DATASET_CHUNK_SIZE = 2048
+DATASET_COLUMNS = ("question", "correct_answer", "difficulty", "category")
 
-def evaluate_answer(question: str, answer: str, role: str):
-    """
-    Evaluates a candidate's quiz answer based on job-specific weighted criteria.
-    Uses a Chain-of-Thought (CoT) reasoning approach internally.
-    """
+# Fallback parsing of non-JSON judge replies: a score is the number after a
+# line's first ":", ending at "/10", the next ":" or the end of the line
+_SCORE_RE = re.compile(r"\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*(?:/10|:|$)")
 
+
+@functools.lru_cache(maxsize=16)
+def _criteria_text(role: str) -> str:
+    """The role's weighted criteria as prompt lines (built once per role)."""
     criteria_obj = EVALUATION_CRITERIA.get(role, {})
     weights = criteria_obj.get("weights", {})
     descriptions = criteria_obj.get("descriptions", {})
 
-    criteria_text = "\n".join([
+    return "\n".join([
         f"- {name} ({weights[name]*100:.0f}%): {descriptions[name]}"
         for name in weights
     ])
 
-    prompt = [
+
+@functools.lru_cache(maxsize=16)
+def _criteria_message(role: str) -> str:
+    """Role, criteria and grading instructions (built once per role)."""
+    return EVALUATION_PROMPT[1]["content"].format(role=role, criteria=_criteria_text(role))
+
+
+def build_evaluation_prompt(question: str, answer: str, role: str):
+    """Builds the judge messages for one answer, with the role's weighted criteria.
+    Only the last message depends on the answer; the fixed messages in front of it
+    form a prefix the provider can cache across a whole run."""
+    return [
         {"role": "system", "content": EVALUATION_PROMPT[0]["content"]},
-        {"role": "user", "content": EVALUATION_PROMPT[1]["content"].format(
-            role=role,
-            question=question,
-            answer=answer,
-            criteria=criteria_text
-        )}
+        {"role": "system", "content": _criteria_message(role)},
+        {"role": "user", "content": EVALUATION_PROMPT[2]["content"].format(question=question, answer=answer)}
     ]
 
-    response = gpt_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=prompt,
-        max_tokens=1200,
-        temperature=0.3
-    )
 
-    evaluation_text = response.choices[0].message.content.strip()
+def _parse_response(response):
+    choice = response.choices[0]
+    if choice.finish_reason == "length":
+        raise ValueError("Judge reply was cut off at max_tokens")
+    return parse_content(choice.message.content)
+
+
+def parse_content(evaluation_text: str):
+    """Returns (evaluation, cacheable). Only a JSON verdict with a numeric
+    overall_score is cacheable; anything else is asked again on the next run."""
+    evaluation_text = evaluation_text.strip()
 
     try:
         evaluation_json = json.loads(evaluation_text)
     except json.JSONDecodeError:
-        evaluation_json = parse_evaluation_text(evaluation_text)
+        # not expected in JSON mode (cut-off replies are rejected before this)
+        return parse_evaluation_text(evaluation_text), False
+
+    return evaluation_json, _is_verdict(evaluation_json)
+
+
+def is_score(value) -> bool:
+    """True for a usable numeric overall_score (None, text and bools are not)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_verdict(evaluation) -> bool:
+    return isinstance(evaluation, dict) and is_score(evaluation.get("overall_score"))
 
+
+def cached_verdict(cache, key: str):
+    """The cached evaluation for key, or None. Entries without a usable score
+    (written before only valid verdicts were cached) count as misses."""
+    hit = cache.get(key)
+    if hit is None:
+        return None
+    evaluation_json = json.loads(hit)
+    return evaluation_json if _is_verdict(evaluation_json) else None
+
+
+def store_verdict(cache, key: str, evaluation_json, cacheable: bool) -> None:
+    if cacheable:
+        cache.set(key, json.dumps(evaluation_json, ensure_ascii=False))
+
+
+def judge_request(question: str, answer: str, role: str):
+    """Judge request parameters, also used as the response cache key."""
+    return {
+        "model": "gpt-4o-mini",
+        "messages": build_evaluation_prompt(question, answer, role),
+        # the JSON verdict is a few hundred tokens; JSON mode keeps it from rambling
+        "max_tokens": 400,
+        "temperature": 0.3,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def _normalize_text(text: str) -> str:
+    # questions and answers often contain code: keep case and indentation,
+    # drop only trailing spaces, blank lines and line-ending differences
+    return "\n".join(line.rstrip() for line in text.strip().splitlines() if line.strip())
+
+
+def judge_cache_key(question: str, answer: str, role: str) -> str:
+    """Cache key for a judge call. Built from the normalized texts, so
+    questions/answers differing only in trailing whitespace, blank lines or
+    line endings share a cached evaluation; the prompt template and criteria
+    are still part of the key."""
+    request = judge_request(_normalize_text(question), _normalize_text(answer), role)
+    return get_llm_cache().key(**request)
+
+
+def evaluate_answer(question: str, answer: str, role: str):
+    """
+    Evaluates a candidate's quiz answer based on job-specific weighted criteria.
+    Uses a Chain-of-Thought (CoT) reasoning approach internally.
+    Repeated (question, answer, role) requests are served from the LLM cache;
+    only valid JSON verdicts are cached.
+    """
+    request = judge_request(question, answer, role)
+    cache = get_llm_cache()
+    key = judge_cache_key(question, answer, role)
+    if (hit := cached_verdict(cache, key)) is not None:
+        return hit
+
+    evaluation_json, cacheable = _parse_response(gpt_client.chat.completions.create(**request))
+    store_verdict(cache, key, evaluation_json, cacheable)
     return evaluation_json
 
 
+async def aevaluate_answer(client, question: str, answer: str, role: str, limiter: AsyncTokenBucket = None):
+    """Async version of evaluate_answer, for evaluating many answers concurrently.
+    If a limiter is given, a token is taken before each API call (cache hits are free)."""
+    request = judge_request(question, answer, role)
+    cache = get_llm_cache()
+    key = judge_cache_key(question, answer, role)
+    if (hit := cached_verdict(cache, key)) is not None:
+        return hit
+
+    if limiter is not None:
+        await limiter.acquire()
+    evaluation_json, cacheable = _parse_response(await client.chat.completions.create(**request))
+    store_verdict(cache, key, evaluation_json, cacheable)
+    return evaluation_json
+
+
+async def _evaluate_all(questions, answers, role: str, concurrency: int = JUDGE_CONCURRENCY,
+                        limiter: AsyncTokenBucket = None, client=None):
+    """Evaluates all (question, answer) pairs with at most `concurrency` requests in flight,
+    started no faster than `limiter` allows (pass one limiter to share it across calls).
+    Near-duplicate pairs (same normalized text) are sent once and share the result.
+    Failed evaluations come back as exceptions in their slot (the client itself
+    already retries 429s and 5xx with jittered backoff).
+    Without a `client`, one is created for this call and closed at the end."""
+    if client is None:
+        async with get_async_gpt_client() as client:
+            return await _evaluate_all(questions, answers, role, concurrency, limiter, client)
+
+    if limiter is None:
+        limiter = AsyncTokenBucket(JUDGE_REQUESTS_PER_MINUTE)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    pairs = list(zip(questions, answers))
+    keys = [judge_cache_key(q, a, role) for q, a in pairs]
+    unique = dict(zip(keys, pairs))
+
+    async def bounded(question, answer):
+        try:
+            async with semaphore:
+                return await aevaluate_answer(client, question, answer, role, limiter)
+        finally:
+            progress.update()
+
+    with tqdm(total=len(unique), desc="Judging", unit="answer") as progress:
+        evaluations = await asyncio.gather(
+            *(bounded(q, a) for q, a in unique.values()),
+            return_exceptions=True
+        )
+
+    by_key = dict(zip(unique, evaluations))
+    return [by_key[key] for key in keys]
+
+
 def parse_evaluation_text(evaluation_text: str):
     """
     Parses text output if the model fails to return strict JSON.
@@ -59,26 +211,19 @@ def parse_evaluation_text(evaluation_text: str):
       Overall Score: Y/10
       Recommendation: PASS/FAIL
     """
-    lines = evaluation_text.strip().split('\n')
     scores = {}
     overall_score = None
     recommendation = None
 
-    for line in lines:
+    # later overall/recommendation lines win, as the model sometimes restates its verdict
+    for line in evaluation_text.strip().split('\n'):
         if '/10' in line and 'Overall' not in line:
-            parts = line.split(':')
-            if len(parts) >= 2:
-                criterion_name = parts[0].strip().replace("-", "")
-                score_part = parts[1].split('/10')[0].strip()
-                try:
-                    scores[criterion_name] = {"score": float(score_part), "comment": ""}
-                except ValueError:
-                    continue
+            name, sep, rest = line.partition(':')
+            if sep and (m := _SCORE_RE.match(rest)):
+                scores[name.strip().replace("-", "")] = {"score": float(m[1]), "comment": ""}
         elif 'Overall Score:' in line:
-            try:
-                overall_score = float(line.split(':')[1].split('/10')[0].strip())
-            except ValueError:
-                pass
+            if m := _SCORE_RE.match(line.partition(':')[2]):
+                overall_score = float(m[1])
         elif 'Recommendation:' in line:
             if 'PASS' in line.upper():
                 recommendation = 'PASS'
@@ -97,57 +242,94 @@ def parse_evaluation_text(evaluation_text: str):
     }
 
 
-def evaluate_dataset_with_judge(role="Software Engineer"):
-    """
-    Uses the LLM-as-a-Judge system to evaluate all answers 
-    in the Python MCQ dataset from Kaggle.
-    """
+def iter_judge_dataset(chunksize: int = DATASET_CHUNK_SIZE):
+    """Downloads the Python MCQ dataset from Kaggle and yields its questions,
+    answers, difficulties and categories as arrays, `chunksize` rows at a time."""
     print("Downloading dataset from Kaggle...")
     path = kagglehub.dataset_download("kusalmadurayapa/python-mcq")
 
     dataset_dir = Path(path)
     csv_file = list(dataset_dir.glob("*.csv"))[0]
-    df = pd.read_csv(csv_file)
-    print(f"Loaded dataset with {len(df)} records.")
+    reader = pd.read_csv(
+        csv_file,
+        usecols=lambda column: column in DATASET_COLUMNS,
+        dtype="string",
+        chunksize=chunksize
+    )
 
-    results = []
+    for chunk in reader:
+        print(f"Loaded {len(chunk)} records.")
+        yield (
+            chunk.get("question", pd.Series("", index=chunk.index)).fillna("").to_numpy(),
+            chunk.get("correct_answer", pd.Series("", index=chunk.index)).fillna("").to_numpy(),
+            chunk.get("difficulty", pd.Series("N/A", index=chunk.index)).fillna("N/A").to_numpy(),
+            chunk.get("category", pd.Series("N/A", index=chunk.index)).fillna("N/A").to_numpy(),
+        )
 
-    for i, row in df.iterrows():
-        question = str(row.get("question", ""))
-        answer = str(row.get("correct_answer", ""))
 
-        print(f"\nEvaluating Q{i+1}/{len(df)}: {question[:80]}...")
+def save_judge_results(chunks):
+    """
+    Writes one result line per evaluation to RESULTS_FILE and prints the average score.
+    `chunks` yields (questions, answers, difficulties, categories, evaluations) tuples.
+    """
+    valid_scores = []
+    i = 0
+    with open(RESULTS_FILE, "wb") as results_file:
+        for questions, answers, diffs, cats, evaluations in chunks:
+            for question, answer, difficulty, category, evaluation in zip(
+                questions, answers, diffs, cats, evaluations
+            ):
+                i += 1
+                if isinstance(evaluation, Exception):
+                    print(f"Error evaluating Q{i}: {evaluation}")
+                    evaluation = {"error": str(evaluation)}
+                elif isinstance(evaluation, dict) and is_score(evaluation.get("overall_score")):
+                    valid_scores.append(evaluation["overall_score"])
 
-        try:
-            evaluation = evaluate_answer(question, answer, role)
-        except Exception as e:
-            print(f"Error evaluating Q{i+1}: {e}")
-            evaluation = {"error": str(e)}
-
-        results.append({
-            "question": question,
-            "answer": answer,
-            "evaluation": evaluation,
-            "difficulty": row.get("difficulty", "N/A"),
-            "category": row.get("category", "N/A")
-        })
-
-    df_results = pd.DataFrame(results)
-    df_results.to_json("llm_judge_evaluation_results.json", indent=2, force_ascii=False)
+                result = {
+                    "question": question,
+                    "answer": answer,
+                    "evaluation": evaluation,
+                    "difficulty": difficulty,
+                    "category": category
+                }
+                # One JSON line per evaluation, written as each chunk finishes
+                results_file.write(orjson.dumps(result) + b"\n")
 
     print("\nEvaluation complete.")
-    print("Results saved to llm_judge_evaluation_results.json")
+    print(f"Results saved to {RESULTS_FILE}")
 
-    valid_scores = [
-        r["evaluation"].get("overall_score")
-        for _, r in df_results.iterrows()
-        if isinstance(r["evaluation"], dict) and "overall_score" in r["evaluation"]
-    ]
     if valid_scores:
         avg_score = sum(valid_scores) / len(valid_scores)
         print(f"Average Overall Score: {avg_score:.2f}/10")
 
 
+def evaluate_dataset_with_judge(role="Software Engineer"):
+    """
+    Uses the LLM-as-a-Judge system to evaluate all answers 
+    in the Python MCQ dataset from Kaggle.
+    For a cheaper, non-interactive run see src/batch_evaluate.py.
+    """
+    # One event loop and client for all chunks, so connections are kept between
+    # chunks and the rate limit carries over from one chunk to the next
+    limiter = AsyncTokenBucket(JUDGE_REQUESTS_PER_MINUTE)
+    with asyncio.Runner() as runner:
+        client = get_async_gpt_client()
+        try:
+            def evaluated_chunks():
+                for questions, answers, diffs, cats in iter_judge_dataset():
+                    print(f"Evaluating {len(questions)} answers ({JUDGE_CONCURRENCY} concurrent requests)...")
+                    evaluations = runner.run(
+                        _evaluate_all(questions, answers, role, limiter=limiter, client=client)
+                    )
+                    yield questions, answers, diffs, cats, evaluations
+
+            save_judge_results(evaluated_chunks())
+        finally:
+            # close while the loop is still running; the pool can't be reused after it
+            runner.run(client.close())
+
+
 if __name__ == "__main__":
     # Single question test
     question = "Write a function to train a simple linear regression model using scikit-learn."
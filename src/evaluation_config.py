@@ -18,14 +18,10 @@ EVALUATION_PROMPT = [
         )
     },
     {
-        "role": "user",
+        # Same for every answer to the same role, so it stays a shared prompt prefix
+        "role": "system",
         "content": """Evaluate the candidate’s submission for the **{role}** position.
-
-**Task / Exam Question:**
-{question}
-
-**Candidate Submission:**
-{answer}
+The exam question and the candidate's submission are given in the next message.
 
 **Evaluation Criteria (with weights and descriptions):**
 {criteria}
@@ -58,6 +54,15 @@ EVALUATION_PROMPT = [
   "recommendation": "<PASS or FAIL>",
   "summary": "<2-3 sentence summary>"
 }}
+"""
+    },
+    {
+        "role": "user",
+        "content": """**Task / Exam Question:**
+{question}
+
+**Candidate Submission:**
+{answer}
 """
     }
 ]
@@ -1,84 +1,89 @@
+import itertools
 import json
-import copy
+import ijson
 from src.infra.gpt_client import get_gpt_client
 from src.config import GPT_PROMPT, GPT_MODEL, GPT_TEMPERATURE
 import pandas as pd
 
 
 gpt_client = get_gpt_client()
-def gpt_quiz(job_description: str, sector: str, job_field: str, data_path: str = None):
-    formatted_prompt = None
 
-    if job_field == "full stack developer":
-        formatted_prompt = copy.deepcopy(GPT_PROMPT["full_stack_developer"])
-    elif job_field == "ai engineering":
-        formatted_prompt = copy.deepcopy(GPT_PROMPT["ai_engineering"])
-    elif job_field == "cyber security":
-        formatted_prompt = copy.deepcopy(GPT_PROMPT["cyber_security"])
-    elif job_field == "cloud engineering":
-        formatted_prompt = copy.deepcopy(GPT_PROMPT["cloud_engineering"])
-    elif job_field == "software engineering":
-        formatted_prompt = copy.deepcopy(GPT_PROMPT["software_engineering"])
-    else:
+# job field (lowercased) -> prompt in prompts.json; also accepts the role
+# names used by the company form and the prompt keys themselves
+_PROMPT_KEYS = {
+    "full stack developer": "full_stack_developer",
+    "fullstack developer": "full_stack_developer",
+    "ai engineering": "ai_engineering",
+    "ai engineer": "ai_engineering",
+    "cyber security": "cyber_security",
+    "cloud engineering": "cloud_engineering",
+    "cloud engineer": "cloud_engineering",
+    "software engineering": "software_engineering",
+    "software engineer": "software_engineering",
+}
+_PROMPT_KEYS.update({key: key for key in set(_PROMPT_KEYS.values())})
+
+
+def gpt_quiz(job_description: str, sector: str, job_field: str, data_path: str = None):
+    prompt_key = _PROMPT_KEYS.get(job_field.strip().lower())
+    if prompt_key is None:
         raise ValueError(f"Unsupported job field: {job_field}")
+    system_message, user_message = GPT_PROMPT[prompt_key]
+    fields = {"description": job_description, "sector": sector}
 
     data_context = ""
-    if job_field == "ai engineering":
+    if prompt_key == "ai_engineering":
         if data_path is None:
             raise ValueError("Dataset path is required for AI Engineering quizzes")
-        df = pd.read_csv(data_path)
+        df = pd.read_csv(data_path, nrows=5)
         data_context = (
             f"Columns: {list(df.columns)}\n\n"
-            f"Sample rows:\n{df.head(5).to_string(index=False)}"
-        )
-        formatted_prompt[1]["content"] = formatted_prompt[1]["content"].format(
-            description=job_description, sector=sector, dataset=data_context
+            f"Sample rows:\n{df.to_string(index=False)}"
         )
+        fields["dataset"] = data_context
 
-    
-    elif job_field == "cyber security":
+    elif prompt_key == "cyber_security":
         if data_path is None:
             raise ValueError("Data path is required for Cybersecurity quizzes")
 
         if data_path.endswith(".csv"):
-            df = pd.read_csv(data_path)
+            df = pd.read_csv(data_path, nrows=5)
             data_context = (
                 f"CSV file detected.\nColumns: {list(df.columns)}\n\n"
-                f"Sample rows:\n{df.head(5).to_string(index=False)}"
+                f"Sample rows:\n{df.to_string(index=False)}"
             )
 
         elif data_path.endswith(".json"):
-            with open(data_path, "r") as f:
-                data = json.load(f)
+            # stream just the first entries instead of loading the whole file
+            with open(data_path, "rb") as f:
+                data = list(itertools.islice(ijson.items(f, "item", use_float=True), 3))
             data_context = (
                 "JSON file detected.\nSample entries:\n"
-                + json.dumps(data[:3], indent=2)
+                + json.dumps(data, indent=2)
             )
 
         elif data_path.endswith(".log") or data_path.endswith(".txt"):
             with open(data_path, "r") as f:
-                lines = f.readlines()
+                lines = list(itertools.islice(f, 5))
             data_context = (
                 "Syslog file detected.\nSample log lines:\n"
-                + "".join(lines[:5])
+                + "".join(lines)
             )
 
         else:
             raise ValueError("Unsupported file format for Cybersecurity quizzes")
 
-        formatted_prompt[1]["content"] = formatted_prompt[1]["content"].format(
-            description=job_description, sector=sector, dataset=data_context
-        )
-
-    else:
-        formatted_prompt[1]["content"] = formatted_prompt[1]["content"].format(
-            description=job_description, sector=sector
-        )
+        fields["dataset"] = data_context
 
+    # the system message is shared as-is; only the user message is formatted
+    messages = [
+        system_message,
+        {"role": user_message["role"], "content": user_message["content"].format(**fields)},
+    ]
 
     response = gpt_client.chat.completions.create(
         model=GPT_MODEL,
-        messages=formatted_prompt,
+        messages=messages,
         max_tokens=1500,
         temperature=GPT_TEMPERATURE,
     )
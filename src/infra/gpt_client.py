@@ -1,17 +1,23 @@
-from openai import OpenAI
+import functools
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
 from src.config import GPT_API_KEY
-import logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
 
 
-gpt = OpenAI(api_key=GPT_API_KEY)
-def get_gpt_client():
-    logger.info("Establishing connection with OpenAI...")  
-    try:
-        logger.info(f"OpenAI Connection Successful!")
-        return gpt
+@functools.lru_cache(maxsize=1)
+def get_gpt_client() -> OpenAI:
+    """Shared OpenAI client (one connection pool for the whole process)."""
+    return OpenAI(api_key=GPT_API_KEY)
 
-    except Exception as e:
-        logger.error(f"OpenAI Connection Failed: {e}")
-        return None 
+
+def get_async_gpt_client() -> AsyncOpenAI:
+    """New async client for fanning out many concurrent requests (e.g. the LLM judge).
+    Uses HTTP/2, so concurrent requests are multiplexed over a few kept-alive connections.
+    Not cached: its connection pool is bound to the event loop it runs on, so create one
+    per event loop and close it before that loop ends."""
+    # The SDK's default pool limits already cover the judge's concurrency; only
+    # HTTP/2 is switched on. Plain numbers are passed so this does not depend on
+    # which httpx package the installed SDK is built on.
+    http_client = DefaultAsyncHttpxClient(http2=True)
+    # 429s that still get through the judge's rate limiter are retried with
+    # the SDK's jittered exponential backoff (honouring Retry-After)
+    return AsyncOpenAI(api_key=GPT_API_KEY, http_client=http_client, timeout=60.0, max_retries=5)
@@ -0,0 +1,47 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = ".llm_cache.sqlite3"
+
+
+class LLMCache:
+    """Exact-match cache of LLM responses in a local SQLite file.
+
+    Keys are hashes of the full request (model, messages, sampling params),
+    so a rerun with identical inputs is answered from disk instead of the API.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(**request) -> str:
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO llm_cache (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache() -> LLMCache:
+    logger.info("Opening LLM response cache at %s", LLM_CACHE_PATH)
+    return LLMCache()
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter shared by worker threads
+    Blocks until a call fits in the last `period` seconds
+    """
+
+    def __init__(self, max_calls: int, period: float = 60.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+class AsyncTokenBucket:
+    """
+    Token-bucket rate limiter for asyncio tasks
+    Refills `rate` tokens every `period` seconds (bursts up to `rate`);
+    each acquire() takes one token, waiting for a refill if the bucket is empty
+    """
+
+    def __init__(self, rate: int, period: float = 60.0):
+        self.capacity = rate
+        self.fill_rate = rate / period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.fill_rate)